@@ -1,14 +1,24 @@
 # build_schenker_workbook.py
-import os, io, textwrap, requests, tempfile
+import os, io, re, tempfile, hashlib, json, shutil, math, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from multiprocessing import Pool
 from pathlib import Path
-from pdf2image import convert_from_bytes
+try:
+    import fitz  # PyMuPDF
+    import requests
+    from requests.adapters import HTTPAdapter
+    _HAS_RENDERER = True
+except ImportError:
+    # Without PyMuPDF the excerpts are referenced by URL in placeholder boxes,
+    # so that mode needs nothing beyond reportlab
+    _HAS_RENDERER = False
 from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Image,
                                 PageBreak, Table, TableStyle)
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from PIL import Image as PILImage
 
 # ----------------------------
 # CONFIG: repertoire sources (all public-domain or CC-BY-SA typesets)
@@ -20,7 +30,8 @@ SOURCES = {
         "url": "https://www.mutopiaproject.org/ftp/BachJS/BWV269/bwv_269/bwv_269-a4.pdf",
         "license": "Public Domain (Mutopia typeset)",
         "citation": "Mutopia BWV 269 (Public Domain).",
-        "page": 1
+        "page": 1,
+        "height_scale": 0.45
     },
     # Bach Invention No. 1 in C, BWV 772  Mutopia (CC-BY-SA or PD depending edition; this file is CC-BY-SA)
     "bach_invention_bwv772": {
@@ -28,7 +39,8 @@ SOURCES = {
         "url": "https://www.mutopiaproject.org/ftp/BachJS/BWV772/bach-invention-01/bach-invention-01-a4.pdf",
         "license": "CC BY-SA 3.0 (Mutopia typeset)  include attribution",
         "citation": "Mutopia BWV 772 (CC BY-SA 3.0).",
-        "page": 1
+        "page": 1,
+        "height_scale": 0.45
     },
     # Mozart K.545 (Allegro)  Mutopia (public typeset)
     "mozart_k545": {
@@ -36,7 +48,8 @@ SOURCES = {
         "url": "https://www.mutopiaproject.org/ftp/MozartWA/KV545/K545-1/K545-1-let.pdf",
         "license": "Mutopia typeset (license noted on score)",
         "citation": "Mutopia Mozart K.545-1 (see score for license).",
-        "page": 1
+        "page": 1,
+        "height_scale": 0.45
     },
     # Chopin Prelude Op.28 No.20  Mutopia (Public Domain typeset)
     "chopin_op28_20": {
@@ -44,224 +57,456 @@ SOURCES = {
         "url": "https://www.mutopiaproject.org/ftp/ChopinFF/O28/Chop-28-20/Chop-28-20-a4.pdf",
         "license": "Public Domain (Mutopia typeset)",
         "citation": "Mutopia Chopin Op.28/20 (Public Domain).",
-        "page": 1
+        "page": 1,
+        "height_scale": 0.52
     },
 }
 
+# Rendered excerpt pages are cached across runs, keyed by url|page|size|dpi
+CACHE = Path(os.path.expanduser("~/.cache/schenker_workbook"))
+DISPLAY_DPI = 150  # effective resolution of an excerpt as placed in the workbook
+
+if _HAS_RENDERER:
+    CACHE.mkdir(parents=True, exist_ok=True)
+    # All sources live on the same host, so share one keep-alive connection pool
+    SESSION = requests.Session()
+    SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# Page 1 of a linearized PDF can be rendered from the head of the file alone;
+# remember per URL whether that worked so a failed probe is not repeated
+PREFIX_BYTES = 1 << 20
+PREFIX_URLS = CACHE / "prefix_urls.json"
+prefix_urls = None  # url -> page 1 rendered from the prefix; loaded on first use
+prefix_urls_lock = threading.Lock()
+
 # ----------------------------
 # HELPERS
 # ----------------------------
-def fetch_pdf(url: str) -> bytes:
-    r = requests.get(url, timeout=60)
-    r.raise_for_status()
-    return r.content
+def read_json(path: Path):
+    # None when the file is missing or was left half-written by an interrupted run
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+def write_json(path: Path, obj) -> None:
+    # Write a sibling temp file and rename it over the target, so a crash
+    # mid-write never leaves a truncated cache file behind
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=".tmp", delete=False) as tmp:
+        json.dump(obj, tmp)
+    os.replace(tmp.name, path)
+
+def validators(headers) -> dict:
+    return {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
+def stream_to_file(r) -> Path:
+    # Stream the body to disk in 64 KB chunks instead of holding it in memory
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    try:
+        with tmp:
+            r.raw.decode_content = True
+            shutil.copyfileobj(r.raw, tmp, length=65536)
+    except BaseException:
+        os.unlink(tmp.name)  # don't leave a partial download in the temp dir
+        raise
+    return Path(tmp.name)
+
+def fetch_pdf_to_file(url: str) -> tuple[Path, dict]:
+    with SESSION.get(url, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        return stream_to_file(r), validators(r.headers)
+
+def first_page_from_prefix(prefix: bytes) -> bytes | None:
+    # The linearization dict gives the end of the first-page section (/E) and
+    # page 1's object number (/O). Graft that page onto a one-page tree, since
+    # the real page tree lives past the prefix.
+    lin = re.search(rb"/Linearized\b.*?>>", prefix[:1024], re.S)
+    end = lin and re.search(rb"/E\s+(\d+)", lin.group(0))
+    first = lin and re.search(rb"/O\s+(\d+)", lin.group(0))
+    if not (end and first) or int(end.group(1)) > len(prefix):
+        return None
+    first = int(first.group(1))
+    try:
+        with fitz.open(stream=prefix[:int(end.group(1))], filetype="pdf") as pdf:
+            if "null" in (pdf.xref_get_key(first, "MediaBox")[0], pdf.xref_get_key(first, "Resources")[0]):
+                return None  # inherited from the page tree we do not have
+            pages = pdf.get_new_xref()
+            pdf.update_object(pages, f"<< /Type /Pages /Kids [{first} 0 R] /Count 1 >>")
+            pdf.xref_set_key(first, "Parent", f"{pages} 0 R")
+            pdf.xref_set_key(pdf.pdf_catalog(), "Pages", f"{pages} 0 R")
+            return pdf.tobytes()
+    except (RuntimeError, ValueError):
+        return None
+
+def write_temp_pdf(data: bytes) -> Path:
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    try:
+        with tmp:
+            tmp.write(data)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    return Path(tmp.name)
+
+def remember_prefix(url: str, worked: bool) -> None:
+    # Next time, skip the probe unless a prefix alone was enough
+    with prefix_urls_lock:
+        if prefix_urls.get(url) != worked:
+            prefix_urls[url] = worked
+            write_json(PREFIX_URLS, prefix_urls)
+
+def fetch_first_page(url: str) -> tuple[bytes | Path, dict] | None:
+    # Network only, so it is safe on a worker thread. Returns the head of the
+    # file as bytes for the caller to cut page 1 from, a Path when the server
+    # ignored Range and sent the whole file, or None to fall back to a full
+    # download.
+    global prefix_urls
+    with prefix_urls_lock:
+        if prefix_urls is None:
+            prefix_urls = read_json(PREFIX_URLS) or {}
+        if prefix_urls.get(url) is False:
+            return None
+    with SESSION.get(url, headers={"Range": f"bytes=0-{PREFIX_BYTES - 1}"}, stream=True, timeout=60) as r:
+        if not r.ok:
+            return None  # e.g. 416; the full download reports any real error
+        if r.status_code == 206:
+            return r.raw.read(PREFIX_BYTES, decode_content=True), validators(r.headers)
+        # Without Range support the server is sending the whole file: stream it
+        # to disk like any other download rather than buffering it
+        remember_prefix(url, False)
+        return stream_to_file(r), validators(r.headers)
 
-def pdf_page_to_png(pdf_bytes: bytes, page_number: int, dpi=300) -> PILImage.Image:
-    # page_number is 1-based
-    imgs = convert_from_bytes(pdf_bytes, dpi=dpi, first_page=page_number, last_page=page_number)
-    return imgs[0]
+def upstream_unchanged(url: str, cached: dict) -> bool:
+    # A HEAD request is enough to tell whether the cached render is stale
+    if not any(cached.values()):
+        return True
+    try:
+        r = SESSION.head(url, timeout=10, allow_redirects=True)
+        r.raise_for_status()
+    except requests.RequestException:
+        return True  # offline: keep using the cached render
+    return validators(r.headers) == cached
+
+def excerpt_size(key: str) -> tuple[float, float]:
+    # Box (in points) the excerpt image is scaled into on its exercise page
+    return CONTENT_W, CONTENT_H * SOURCES[key]["height_scale"]
+
+def pdf_page_to_jpg(pdf_path: Path, page_number: int, out_jpg: Path, size, dpi=DISPLAY_DPI) -> Path:
+    # page_number is 1-based; only that page is decoded and rasterized, with
+    # just enough pixels to fill `size` (points) at `dpi`
+    with fitz.open(pdf_path) as pdf:
+        page = pdf.load_page(page_number - 1)
+        scale = max(size[0] / page.rect.width, size[1] / page.rect.height)
+        pix = page.get_pixmap(dpi=math.ceil(dpi * scale))
+    # Engraved notation survives JPEG q80 well and is several times smaller than PNG.
+    # Like write_json, save beside the target and rename, so an interrupted
+    # re-render never leaves a truncated JPEG next to a valid stamp
+    fd, tmp = tempfile.mkstemp(dir=out_jpg.parent, suffix=".jpg")
+    os.close(fd)
+    try:
+        pix.save(tmp, jpg_quality=80)
+        os.replace(tmp, out_jpg)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return out_jpg
 
 def caption(s: str) -> Paragraph:
-    return Paragraph(s, styles["Normal"])
+    return Paragraph(s, NORMAL)
 
-def h1(s: str): return Paragraph(f"<b>{s}</b>", styles["Heading1"])
-def h2(s: str): return Paragraph(f"<b>{s}</b>", styles["Heading2"])
-def h3(s: str): return Paragraph(f"<b>{s}</b>", styles["Heading3"])
+def h1(s: str): return Paragraph(f"<b>{s}</b>", H1_STYLE)
+def h2(s: str): return Paragraph(f"<b>{s}</b>", H2_STYLE)
+def h3(s: str): return Paragraph(f"<b>{s}</b>", H3_STYLE)
 
 def hr(sp=6):
-    tbl = Table([[""]], colWidths=[PAGE_W-2*MARGIN], rowHeights=[0.4])
+    tbl = Table([[""]], colWidths=[CONTENT_W], rowHeights=[0.4])
     tbl.setStyle(TableStyle([("LINEBELOW", (0,0), (-1,-1), 0.6, colors.grey)]))
     return [tbl, Spacer(1, sp)]
 
+def create_placeholder_box(title, url):
+    """Create a placeholder box with instructions to download the score"""
+    data = [
+        [title],
+        [""],
+        ["Score PDF available at:"],
+        [url],
+        [""],
+        ["Download and insert the first page here for analysis"],
+        [""],
+        ["(Placeholder - actual score not embedded because PyMuPDF or requests is not installed)"]
+    ]
+
+    table = Table(data, colWidths=[CONTENT_W])
+    table.setStyle(TableStyle([
+        ("ALIGN", (0,0), (-1,-1), "CENTER"),
+        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+        ("FONTNAME", (0,0), (0,0), "Helvetica-Bold"),
+        ("FONTSIZE", (0,0), (0,0), 12),
+        ("FONTSIZE", (0,3), (0,3), 9),
+        ("TEXTCOLOR", (0,3), (0,3), colors.blue),
+        ("FONTNAME", (0,7), (0,7), "Helvetica-Oblique"),
+        ("FONTSIZE", (0,7), (0,7), 8),
+        ("BOX", (0,0), (-1,-1), 1, colors.grey),
+        ("BACKGROUND", (0,0), (-1,-1), colors.whitesmoke),
+        ("ROWBACKGROUNDS", (0,0), (-1,0), [colors.lightgrey]),
+    ]))
+    return table
+
 # ----------------------------
 # OUTPUT DOC
 # ----------------------------
 PAGE_W, PAGE_H = letter
 MARGIN = 0.75 * inch
+CONTENT_W, CONTENT_H = PAGE_W - 2*MARGIN, PAGE_H - 2*MARGIN
+PLAN_COLS = [1.4*inch, CONTENT_W - 1.4*inch]
+TRACKER_COLS = [0.9*inch, 2.0*inch, 1.2*inch, 1.2*inch, CONTENT_W - (0.9+2.0+1.2+1.2)*inch]
+# Shared by the study-plan, reference and tracker tables
+GRID_STYLE = TableStyle([
+    ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+    ("INNERGRID", (0,0), (-1,-1), 0.5, colors.grey),
+    ("BOX", (0,0), (-1,-1), 0.75, colors.black)
+])
 styles = getSampleStyleSheet()
+# Looked up once rather than on every heading/caption
+NORMAL = styles["Normal"]
+H1_STYLE, H2_STYLE, H3_STYLE = styles["Heading1"], styles["Heading2"], styles["Heading3"]
 
 OUT = Path("Schenkerian_Analysis_Workbook.pdf")
-doc = SimpleDocTemplate(
-    str(OUT), pagesize=letter,
-    leftMargin=MARGIN, rightMargin=MARGIN,
-    topMargin=MARGIN, bottomMargin=MARGIN
-)
 
-story = []
+def build_pdf(story) -> bytes:
+    # Lay out one part of the workbook; the parts are stitched together at the end
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buf, pagesize=letter,
+        leftMargin=MARGIN, rightMargin=MARGIN,
+        topMargin=MARGIN, bottomMargin=MARGIN
+    )
+    doc.build(list(story))  # build() consumes the flowables it is given
+    return buf.getvalue()
+
+def build_sections(sections) -> bytes:
+    # Each section starts on a new page of its part
+    story = []
+    for i, section in enumerate(sections):
+        if i:
+            story.append(PageBreak())
+        story.extend(section())
+    return build_pdf(story)
 
 # ----------------------------
 # FRONT MATTER
 # ----------------------------
-story += [
-    Paragraph("<b>Schenkerian Analysis Workbook</b>", styles["Title"]),
-    Spacer(1, 8),
-    Paragraph("12-Week Self-Study · Public-Domain Excerpts Included", styles["Italic"]),
-    Spacer(1, 18),
-    caption("This workbook guides you from foreground reductions to middleground and background sketches, with short public-domain excerpts embedded for hands-on practice."),
-    Spacer(1, 18),
-]
-story += hr()
-story += [h2("How to Use"), caption(
-    "1) For each excerpt, first reduce to soprano + bass; 2) identify the Urlinie (321 or 54321); "
-    "3) outline the bass arpeggiation (IVI); 4) mark prolongations and cadential patterns."
-)]
-story.append(PageBreak())
+def front_matter():
+    return (
+        Paragraph("<b>Schenkerian Analysis Workbook</b>", styles["Title"]),
+        Spacer(1, 8),
+        Paragraph("12-Week Self-Study · Public-Domain Excerpts " + ("Included" if _HAS_RENDERER else "Referenced"), styles["Italic"]),
+        Spacer(1, 18),
+        caption("This workbook guides you from foreground reductions to middleground and background sketches, with "
+                + ("short public-domain excerpts embedded" if _HAS_RENDERER else "references to public-domain excerpts")
+                + " for hands-on practice."),
+        Spacer(1, 18),
+        *hr(),
+        h2("How to Use"),
+        caption(
+            "1) For each excerpt, first reduce to soprano + bass; 2) identify the Urlinie (321 or 54321); "
+            "3) outline the bass arpeggiation (IVI); 4) mark prolongations and cadential patterns."
+        ),
+    )
 
 # ----------------------------
 # STUDY PLAN (CONDENSED)
 # ----------------------------
-story += [h1("12-Week Study Plan (Condensed)")]
-plan_points = [
-    ("Weeks 12", "Foundations: Urlinie, Bassbrechung, simple reductions (Bach chorales)."),
-    ("Weeks 34", "Foreground reductions: Bach inventions (24 bar segments)."),
-    ("Weeks 56", "Middleground: prolongations across phrases; neighbor/passing harmonies."),
-    ("Weeks 78", "Cadences & dominant prolongations: Mozart K.545 (Allegro)."),
-    ("Weeks 910", "Small complete works: Chopin preludes."),
-    ("Weeks 1112", "Integration: complete background sketch; written commentary."),
-]
-table = Table(
-    [["Week(s)", "Focus"]] + plan_points,
-    colWidths=[1.4*inch, (PAGE_W-2*MARGIN) - 1.4*inch]
-)
-table.setStyle(TableStyle([
-    ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-    ("INNERGRID", (0,0), (-1,-1), 0.5, colors.grey),
-    ("BOX", (0,0), (-1,-1), 0.75, colors.black)
-]))
-story += [table, Spacer(1, 12)]
-story += [caption("Tip: play reductions at the keyboard to internalize the hierarchy."), PageBreak()]
+def study_plan():
+    plan_points = [
+        ("Weeks 12", "Foundations: Urlinie, Bassbrechung, simple reductions (Bach chorales)."),
+        ("Weeks 34", "Foreground reductions: Bach inventions (24 bar segments)."),
+        ("Weeks 56", "Middleground: prolongations across phrases; neighbor/passing harmonies."),
+        ("Weeks 78", "Cadences & dominant prolongations: Mozart K.545 (Allegro)."),
+        ("Weeks 910", "Small complete works: Chopin preludes."),
+        ("Weeks 1112", "Integration: complete background sketch; written commentary."),
+    ]
+    table = Table(
+        [["Week(s)", "Focus"]] + plan_points,
+        colWidths=PLAN_COLS
+    )
+    table.setStyle(GRID_STYLE)
+    return (
+        h1("12-Week Study Plan (Condensed)"),
+        table, Spacer(1, 12),
+        caption("Tip: play reductions at the keyboard to internalize the hierarchy."),
+    )
 
 # ----------------------------
 # DOWNLOAD & RENDER EXCERPTS
 # ----------------------------
-tmpdir = Path(tempfile.mkdtemp())
-images = {}  # key -> PNG path
-for key, meta in SOURCES.items():
-    pdf_bytes = fetch_pdf(meta["url"])
-    img = pdf_page_to_png(pdf_bytes, meta["page"], dpi=300)
-    out_png = tmpdir / f"{key}.png"
-    img.save(out_png)
-    images[key] = out_png
+def cache_paths(key) -> tuple[Path, Path]:
+    meta, size = SOURCES[key], excerpt_size(key)
+    h = hashlib.sha1(f"{meta['url']}|{meta['page']}|{size[0]:.0f}x{size[1]:.0f}|{DISPLAY_DPI}".encode()).hexdigest()
+    return CACHE / f"{h}.jpg", CACHE / f"{h}.json"
+
+def fetch(key, meta):
+    # Download what a render needs; (key, None, None) when the cached JPEG is current
+    jpg, stamp = cache_paths(key)
+    cached = read_json(stamp)
+    if jpg.exists() and cached is not None and upstream_unchanged(meta["url"], cached):
+        return key, None, None
+    fetched = fetch_first_page(meta["url"]) if meta["page"] == 1 else None
+    return (key, *(fetched or fetch_pdf_to_file(meta["url"])))
+
+def render(key, pdf, headers):
+    # PyMuPDF holds the GIL and does not support use from several threads, so
+    # everything that touches it runs here, on the main thread
+    meta = SOURCES[key]
+    jpg, stamp = cache_paths(key)
+    if pdf is None:
+        return key, jpg
+    if isinstance(pdf, bytes):
+        first = first_page_from_prefix(pdf)
+        remember_prefix(meta["url"], first is not None)
+        if first is None:
+            pdf, headers = fetch_pdf_to_file(meta["url"])  # not linearized after all
+        else:
+            pdf = write_temp_pdf(first)
+    try:
+        pdf_page_to_jpg(pdf, meta["page"], jpg, excerpt_size(key))
+    finally:
+        pdf.unlink()
+    write_json(stamp, headers)
+    return key, jpg
 
 # ----------------------------
 # WEEKLY SECTIONS WITH EXCERPTS + STAFF SPACE
 # ----------------------------
-def exercise_page(title, prompt, key, height_scale=0.45):
-    story.append(h2(title))
-    story.append(Spacer(1, 6))
-    story.append(caption(prompt))
-    story.append(Spacer(1, 8))
-    img_path = images[key]
+EXERCISES = [
+    # Weeks 12: Bach Chorale
+    ("Weeks 12 · Bach Chorale (BWV 269)",
+     "Reduce to soprano + bass; propose an Urlinie (likely 321) and outline IVI bass. "
+     "Mark passing/neighbor tones; notate a cadential 64 if present.",
+     "bach_chorale_bwv269"),
+    # Weeks 34: Bach Invention (foreground)
+    ("Weeks 34 · Bach Invention in C, BWV 772 (mm. 14 focus)",
+     "Foreground reduction: remove surface figuration; keep structural tones. Identify basic soprano line and bass support. "
+     "Circle passing tones; beam an Urlinie if applicable.",
+     "bach_invention_bwv772"),
+    # Weeks 78: Mozart K.545 (cadences)
+    ("Weeks 78 · Mozart K.545 I (cadential patterns)",
+     "Locate cadential 64, dominant prolongations, and resolution. Sketch soprano descent over VI.",
+     "mozart_k545"),
+    # Weeks 910: Chopin Prelude (middleground)
+    ("Weeks 910 · Chopin, Prelude in C minor, Op.28/20",
+     "Identify Urlinie (321) and IVI bass arpeggiation. Mark mIII and N6 as predominant intensifiers toward V.",
+     "chopin_op28_20"),
+]
+
+def exercise_page(title, prompt, key, img_path=None):
     # Scale to fit page
-    max_w = PAGE_W - 2*MARGIN
-    max_h = (PAGE_H - 2*MARGIN) * height_scale
-    story.append(Image(str(img_path), width=max_w, height=max_h))
-    story.append(Spacer(1, 6))
-    story.append(caption("<i>Source:</i> " + SOURCES[key]["citation"]))
-    story.append(caption("<i>License:</i> " + SOURCES[key]["license"]))
-    story.append(Spacer(1, 10))
+    max_w, max_h = excerpt_size(key)
+    if _HAS_RENDERER:
+        # Given a .jpg path, ReportLab only reads the header and embeds the JPEG data as-is
+        excerpt = Image(str(img_path), width=max_w, height=max_h)
+    else:
+        excerpt = create_placeholder_box(SOURCES[key]["title"], SOURCES[key]["url"])
     # Add a few blank staff lines (simple lines as placeholders)
     staff_rows = 8
     row = Table([[" "]] * staff_rows, colWidths=[max_w], rowHeights=[0.35*inch]*staff_rows)
-    row.setStyle(TableStyle([
-        ("LINEABOVE", (0,0), (-1,0), 0.8, colors.black),
-        ("LINEABOVE", (0,1), (-1,1), 0.8, colors.black),
-        ("LINEABOVE", (0,2), (-1,2), 0.8, colors.black),
-        ("LINEABOVE", (0,3), (-1,3), 0.8, colors.black),
-        ("LINEABOVE", (0,4), (-1,4), 0.8, colors.black),
-        ("LINEABOVE", (0,5), (-1,5), 0.8, colors.black),
-        ("LINEABOVE", (0,6), (-1,6), 0.8, colors.black),
-        ("LINEABOVE", (0,7), (-1,7), 0.8, colors.black),
-    ]))
-    story.append(row)
-    story.append(PageBreak())
-
-# Weeks 12: Bach Chorale
-exercise_page(
-    "Weeks 12 · Bach Chorale (BWV 269)",
-    "Reduce to soprano + bass; propose an Urlinie (likely 321) and outline IVI bass. "
-    "Mark passing/neighbor tones; notate a cadential 64 if present.",
-    "bach_chorale_bwv269"
-)
-
-# Weeks 34: Bach Invention (foreground)
-exercise_page(
-    "Weeks 34 · Bach Invention in C, BWV 772 (mm. 14 focus)",
-    "Foreground reduction: remove surface figuration; keep structural tones. Identify basic soprano line and bass support. "
-    "Circle passing tones; beam an Urlinie if applicable.",
-    "bach_invention_bwv772"
-)
-
-# Weeks 78: Mozart K.545 (cadences)
-exercise_page(
-    "Weeks 78 · Mozart K.545 I (cadential patterns)",
-    "Locate cadential 64, dominant prolongations, and resolution. Sketch soprano descent over VI.",
-    "mozart_k545"
-)
-
-# Weeks 910: Chopin Prelude (middleground)
-exercise_page(
-    "Weeks 910 · Chopin, Prelude in C minor, Op.28/20",
-    "Identify Urlinie (321) and IVI bass arpeggiation. Mark mIII and N6 as predominant intensifiers toward V.",
-    "chopin_op28_20",
-    height_scale=0.52
-)
+    row.setStyle(TableStyle([("LINEABOVE", (0,0), (-1,-1), 0.8, colors.black)]))
+    return (
+        h2(title),
+        Spacer(1, 6),
+        caption(prompt),
+        Spacer(1, 8),
+        excerpt,
+        Spacer(1, 6),
+        caption("<i>Source:</i> " + SOURCES[key]["citation"]),
+        caption("<i>License:</i> " + SOURCES[key]["license"]),
+        Spacer(1, 10),
+        row,
+    )
+
+def build_excerpt_pdf(title, prompt, key, img_path) -> bytes:
+    return build_pdf(exercise_page(title, prompt, key, img_path))
 
 # ----------------------------
 # REFERENCE PAGES
 # ----------------------------
-story += [h1("Reference: Urlinie & Bass Archetypes"), Spacer(1,8)]
-ref_tbl = Table([
-    ["Urlinie Types", "Bass Archetypes"],
-    ["321 · 54321", "IVI · IIVVI"],
-    ["Tips", "Tips"],
-    ["Beam only structural steps across phrases.", "Treat IV/ii/N6 as predominant prolongations."]
-], colWidths=[(PAGE_W-2*MARGIN)/2]*2)
-ref_tbl.setStyle(TableStyle([
-    ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-    ("INNERGRID", (0,0), (-1,-1), 0.5, colors.grey),
-    ("BOX", (0,0), (-1,-1), 0.75, colors.black)
-]))
-story += [ref_tbl, Spacer(1,12)]
-story += [h2("Cadential Patterns"), caption("Cadential 64  V  I · vii°/V  V · N6  V.")]
-story += [Spacer(1,6)]
-story += hr()[0:1]
-story += [PageBreak()]
+def references():
+    ref_tbl = Table([
+        ["Urlinie Types", "Bass Archetypes"],
+        ["321 · 54321", "IVI · IIVVI"],
+        ["Tips", "Tips"],
+        ["Beam only structural steps across phrases.", "Treat IV/ii/N6 as predominant prolongations."]
+    ], colWidths=[CONTENT_W/2]*2)
+    ref_tbl.setStyle(GRID_STYLE)
+    return (
+        h1("Reference: Urlinie & Bass Archetypes"), Spacer(1,8),
+        ref_tbl, Spacer(1,12),
+        h2("Cadential Patterns"), caption("Cadential 64  V  I · vii°/V  V · N6  V."),
+        Spacer(1,6),
+        hr()[0],
+    )
 
 # ----------------------------
 # LEGENDS & HARMONIC OUTLINE TEMPLATE
 # ----------------------------
-story += [h1("Legends & Quick Glossary"), Spacer(1,8)]
-legend_text = """
+def glossary():
+    legend_text = """
 <b>N6</b> = Neapolitan sixth (mII in 1st inversion).<br/>
 <b>vii°/V</b> = Leading-tone diminished triad to dominant.<br/>
 <b>Cadential 64</b> = I64 over V resolving to V.<br/>
 <b>T/S/D</b> = Tonic / Subdominant (Predominant) / Dominant (German functional labels).<br/>
 <b>Prolongation</b> = Extending a harmony across time via voice-leading (passing/neighbor chords).<br/>
 """
-story += [Paragraph(legend_text, styles["Normal"]), PageBreak()]
+    return (h1("Legends & Quick Glossary"), Spacer(1,8), Paragraph(legend_text, NORMAL))
 
 # ----------------------------
 # PROGRESS TRACKER
 # ----------------------------
-story += [h1("Progress Tracker"), Spacer(1,8)]
-tracker = Table(
-    [["Date", "Piece", "Urlinie", "Bass (IVI?)", "Observations"]] +
-    [["", "", "", "", ""] for _ in range(14)],
-    colWidths=[0.9*inch, 2.0*inch, 1.2*inch, 1.2*inch, (PAGE_W-2*MARGIN) - (0.9+2.0+1.2+1.2)*inch]
-)
-tracker.setStyle(TableStyle([
-    ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-    ("INNERGRID", (0,0), (-1,-1), 0.5, colors.grey),
-    ("BOX", (0,0), (-1,-1), 0.75, colors.black)
-]))
-story += [tracker, PageBreak()]
+def progress_tracker():
+    tracker = Table(
+        [["Date", "Piece", "Urlinie", "Bass (IVI?)", "Observations"]] +
+        [["", "", "", "", ""] for _ in range(14)],
+        colWidths=TRACKER_COLS
+    )
+    tracker.setStyle(GRID_STYLE)
+    return (h1("Progress Tracker"), Spacer(1,8), tracker)
+
+FRONT_SECTIONS = (front_matter, study_plan)
+BACK_SECTIONS = (references, glossary, progress_tracker)
 
 # ----------------------------
 # BUILD
 # ----------------------------
-doc.build(story)
-print(f"Built: {OUT.resolve()}")
+if __name__ == "__main__" and not _HAS_RENDERER:
+    # Nothing to download, rasterize or merge: lay the workbook out in one pass
+    OUT.write_bytes(build_sections(
+        (*FRONT_SECTIONS, *(partial(exercise_page, *ex) for ex in EXERCISES), *BACK_SECTIONS)
+    ))
+    print(f"Built: {OUT.resolve()}")
+    print("Note: Score images are placeholders because PyMuPDF or requests is not installed.")
+    print("To embed the actual score excerpts, install them: pip install pymupdf requests")
+elif __name__ == "__main__":
+    # Downloads are I/O-bound, so the sources are fetched concurrently. PyMuPDF
+    # keeps the GIL and is not thread-safe, so each page is rasterized on this
+    # thread as soon as its download lands, while the rest are still in flight.
+    with ThreadPoolExecutor(max_workers=min(8, len(SOURCES))) as ex:
+        jobs = [ex.submit(fetch, key, meta) for key, meta in SOURCES.items()]
+        images = dict(render(*job.result()) for job in as_completed(jobs))  # key -> JPEG path
+
+    # Each exercise page is laid out as its own small PDF in a worker process
+    # while the front and back matter are built here; the parts are then merged
+    # in workbook order.
+    with Pool(min(4, len(EXERCISES))) as pool:
+        excerpts = pool.starmap_async(
+            build_excerpt_pdf, [(title, prompt, key, images[key]) for title, prompt, key in EXERCISES]
+        )
+        front, back = build_sections(FRONT_SECTIONS), build_sections(BACK_SECTIONS)
+        parts = [front, *excerpts.get(), back]
+
+    workbook = fitz.open()
+    for part in parts:
+        with fitz.open(stream=part, filetype="pdf") as src:
+            workbook.insert_pdf(src)
+    workbook.save(str(OUT))
+    print(f"Built: {OUT.resolve()}")
@@ -1,32 +1,32 @@
-import matplotlib.pyplot as plt
+from PIL import Image as PILImage
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle
+    SimpleDocTemplate, Paragraph, Image, PageBreak, Table, TableStyle
 )
+from reportlab.graphics.shapes import Drawing, Line, PolyLine, Circle, String
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.lib import colors
+import io
 import os
+import tempfile
 
 # ====== CONFIG ======
 PDF_PATH = "chopin_schenkerian_sketch.pdf"
-SKETCH_PNG = "chopin_schenkerian_sketch.png"
 SCORE_IMAGE = "prelude_c_minor_score.png"  # <- put your score image here (PNG/JPG)
+SCORE_DPI = 150  # resolution the score is embedded at
 PAGE_W, PAGE_H = letter
 MARGIN = 0.75 * inch
 MAX_IMG_W = PAGE_W - 2 * MARGIN
 MAX_IMG_H = PAGE_H - 2 * MARGIN
+SKETCH_W, SKETCH_H = MAX_IMG_W, MAX_IMG_H * 0.55
+OUTLINE_COLS = [1.2*inch, 1.5*inch, MAX_IMG_W - (1.2*inch + 1.5*inch)]
 
-# ====== STEP 1: Create the annotated Schenkerian sketch image ======
-fig, ax = plt.subplots(figsize=(11, 6))
-
+# ====== STEP 1: Create the annotated Schenkerian sketch (vector Drawing) ======
 # Urlinie (321)
 x = [1, 5, 9]
 y = [3, 2, 1]
 labels = ["Em (3)\n(mm.14)", "D (2)\n(mm.810)", "C (1)\n(mm.1113)"]
-ax.plot(x, y, marker="o", linewidth=2)
-for i, label in enumerate(labels):
-    ax.text(x[i], y[i] + 0.2, label, ha="center", fontsize=11)
 
 # Bass with expansions
 bass_x = [1, 3, 4, 5, 7, 9]
@@ -39,34 +39,65 @@ bass_labels = [
     "N6 (Dm)\n(m.9)",
     "C (I)\n(mm.1113)"
 ]
-ax.plot(bass_x, bass_y, marker="o", linewidth=2)
-for i, label in enumerate(bass_labels):
-    ax.text(bass_x[i], bass_y[i] - 0.3, label, ha="center", fontsize=9)
-
-# Connect Urlinie to bass
-for ux, uy, bx, by in zip([1, 5, 9], [3, 2, 1], [1, 5, 9], [-1, -2, -1]):
-    ax.plot([ux, bx], [uy, by], linestyle="dotted")
 
-ax.set_ylim(-3, 4)
-ax.set_xlim(0, 10)
-ax.axis("off")
-ax.set_title("Schenkerian Sketch with Measure References  Chopin, Prelude in C minor (Op. 28 No. 20)", fontsize=13)
+# Matplotlib's default colour cycle, so the sketch looks as it did when it was plotted
+URLINIE_COLOR, BASS_COLOR = colors.HexColor("#1f77b4"), colors.HexColor("#ff7f0e")
+LINK_COLORS = [colors.HexColor(c) for c in ("#2ca02c", "#d62728", "#9467bd")]
+TITLE_H = 20  # room above the plot for the sketch title
+
+def to_point(xv, yv):
+    """Map sketch coordinates (x in [0, 10], y in [-3, 4]) into the drawing."""
+    return SKETCH_W * xv / 10, (SKETCH_H - TITLE_H) * (yv + 3) / 7
+
+def add_label(d, xv, yv, text, size):
+    """Centre a (possibly multi-line) label with its last baseline at (xv, yv)."""
+    px, py = to_point(xv, yv)
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        d.add(String(px, py + (len(lines) - 1 - i) * size * 1.2, line,
+                     fontName="Helvetica", fontSize=size, textAnchor="middle"))
+
+def add_path(d, xs, ys, color):
+    """Polyline through the points with a dot at each one."""
+    pts = [to_point(xv, yv) for xv, yv in zip(xs, ys)]
+    d.add(PolyLine([c for pt in pts for c in pt], strokeColor=color, strokeWidth=2))
+    for px, py in pts:
+        d.add(Circle(px, py, 3, fillColor=color, strokeColor=None))
+
+sketch = Drawing(SKETCH_W, SKETCH_H)
+sketch.add(String(SKETCH_W / 2, SKETCH_H - 12, "Schenkerian Sketch with Measure References  Chopin, Prelude in C minor (Op. 28 No. 20)",
+                  fontName="Helvetica", fontSize=10, textAnchor="middle"))
+
+add_path(sketch, x, y, URLINIE_COLOR)
+for xv, yv, label in zip(x, y, labels):
+    add_label(sketch, xv, yv + 0.2, label, 8)
+
+add_path(sketch, bass_x, bass_y, BASS_COLOR)
+for xv, yv, label in zip(bass_x, bass_y, bass_labels):
+    add_label(sketch, xv, yv - 0.3, label, 7)
 
-plt.savefig(SKETCH_PNG, dpi=300, bbox_inches="tight")
-plt.close()
+# Connect Urlinie to bass
+for (x1, y1, x2, y2), color in zip([(1, 3, 1, -1), (5, 2, 5, -2), (9, 1, 9, -1)], LINK_COLORS):
+    sketch.add(Line(*to_point(x1, y1), *to_point(x2, y2),
+                    strokeColor=color, strokeWidth=1, strokeDashArray=[1, 2]))
 
 # ====== STEP 2: Build the PDF ======
 styles = getSampleStyleSheet()
+# Vertical spacing lives on the styles rather than in Spacer flowables
+title_style = styles["Title"].clone("SketchTitle", spaceAfter=18)
+h1_style = styles["Heading1"].clone("SketchHeading1", spaceAfter=14)
+normal = styles["Normal"]
+intro_style = normal.clone("SketchIntro", spaceAfter=12)
+description_style = normal.clone("SketchDescription", spaceAfter=18)
+notes_style = normal.clone("SketchNotes", spaceBefore=10)
+italic = styles["Italic"].clone("SketchItalic", spaceAfter=12)
+buf = io.BytesIO()  # built in memory and written out in one go
 doc = SimpleDocTemplate(
-    PDF_PATH, pagesize=letter,
-    leftMargin=MARGIN, rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN
+    buf, pagesize=letter,
+    leftMargin=MARGIN, rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN,
+    pageCompression=1,
 )
-story = []
-
 # ---------- PAGE 1: Sketch + Notes ----------
-story.append(Paragraph("<b>Schenkerian Sketch  Chopin, Prelude in C minor (Op. 28 No. 20)</b>", styles["Title"]))
-story.append(Spacer(1, 12))
-
 description = """
 This sketch illustrates structural levels in Chopins Prelude in C minor, Op. 28 No. 20.
 
@@ -85,42 +116,59 @@ This sketch illustrates structural levels in Chopins Prelude in C minor, Op. 28
 
 This shows how Chopin dramatizes a simple IVI framework with rich harmonic intensifications.
 """
-story.append(Paragraph(description, styles["Normal"]))
-story.append(Spacer(1, 18))
-story.append(Image(SKETCH_PNG, width=MAX_IMG_W, height=MAX_IMG_H * 0.55))
-story.append(PageBreak())
+story = [
+    Paragraph("<b>Schenkerian Sketch  Chopin, Prelude in C minor (Op. 28 No. 20)</b>", title_style),
+    Paragraph(description, description_style),
+    sketch,
+    PageBreak(),
+]
 
 # ---------- PAGE 2: Score Excerpt ----------
-story.append(Paragraph("<b>Score Excerpt (Public Domain)</b>", styles["Heading1"]))
-story.append(Spacer(1, 8))
+story.append(Paragraph("<b>Score Excerpt (Public Domain)</b>", h1_style))
 story.append(Paragraph(
     "Frédéric Chopin, Prelude in C minor, Op. 28 No. 20  first page excerpt. "
-    "Public domain source (e.g., IMSLP).", styles["Normal"]
+    "Public domain source (e.g., IMSLP).", intro_style
 ))
-story.append(Spacer(1, 12))
 
+scaled_score = None  # temp JPEG of the downsampled score, removed after the build
 if os.path.exists(SCORE_IMAGE):
-    # Scale image to fit within page bounds while maintaining aspect ratio
-    img = Image(SCORE_IMAGE)
-    img._restrictSize(MAX_IMG_W, MAX_IMG_H * 0.85)
-    story.append(img)
+    # Fit within page bounds, keeping the aspect ratio, and downsample to
+    # SCORE_DPI at that size so a 300-dpi scan isn't embedded at full resolution
+    with PILImage.open(SCORE_IMAGE) as im:
+        iw, ih = im.size
+        scale = min(MAX_IMG_W / iw, MAX_IMG_H * 0.85 / ih)
+        w, h = iw * scale, ih * scale
+        im.thumbnail((int(w / 72 * SCORE_DPI), int(h / 72 * SCORE_DPI)), PILImage.LANCZOS)
+        if im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info:
+            # JPEG has no alpha: lay a transparent background onto white, not black
+            rgba = im.convert("RGBA")
+            flat = PILImage.new("RGB", rgba.size, "white")
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            flat = im.convert("RGB")
+    tmp = tempfile.NamedTemporaryFile(suffix=".jpg", delete=False)
+    try:
+        with tmp:
+            flat.save(tmp, "JPEG", quality=85, optimize=True)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    scaled_score = tmp.name
+    story.append(Image(scaled_score, width=w, height=h, lazy=1))
 else:
     story.append(Paragraph(
         f"<i>(Score image not found at '{SCORE_IMAGE}'. "
         f"Export a 300-dpi PNG/JPG of the first page and save it with that name.)</i>",
-        styles["Italic"]))
-    story.append(Spacer(1, 12))
+        italic))
 
 story.append(PageBreak())
 
 # ---------- PAGE 3: Roman-Numeral Harmonic Outline ----------
-story.append(Paragraph("<b>Harmonic Outline (Roman Numerals by Measure)</b>", styles["Heading1"]))
-story.append(Spacer(1, 8))
+story.append(Paragraph("<b>Harmonic Outline (Roman Numerals by Measure)</b>", h1_style))
 story.append(Paragraph(
     "Compact harmonic roadmap in C minor. Local spellings/voicings vary by edition; "
     "outline reflects a common reading aligned with the Schenkerian middleground.",
-    styles["Normal"]))
-story.append(Spacer(1, 12))
+    intro_style))
 
 # Table data: [Measure(s), Harmony (Roman numerals), Function / Notes]
 data = [
@@ -134,20 +182,9 @@ data = [
     ["mm. 1113","i",                 "Tonic resolution / close"],
 ]
 
-table = Table(data, colWidths=[1.2*inch, 1.5*inch, MAX_IMG_W - (1.2*inch + 1.5*inch)])
-table.setStyle(TableStyle([
-    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-    ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-    ("ALIGN", (0,0), (-1,0), "CENTER"),
-    ("VALIGN", (0,0), (-1,-1), "TOP"),
-    ("INNERGRID", (0,0), (-1,-1), 0.5, colors.grey),
-    ("BOX", (0,0), (-1,-1), 0.75, colors.black),
-    ("ROWBACKGROUNDS", (0,1), (-1,-1), [colors.whitesmoke, colors.white]),
-]))
 # Add a header row label
 data.insert(0, ["Measure(s)", "Harmony", "Function / Notes"])
-# Rebuild table with header formatting
-table = Table(data, colWidths=[1.2*inch, 1.5*inch, MAX_IMG_W - (1.2*inch + 1.5*inch)])
+table = Table(data, colWidths=OUTLINE_COLS)
 table.setStyle(TableStyle([
     ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
     ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
@@ -159,13 +196,18 @@ table.setStyle(TableStyle([
 ]))
 
 story.append(table)
-story.append(Spacer(1, 10))
 story.append(Paragraph(
     "<i>Notes:</i> The N6 (Dm) functions as an intensified predominant that resolves to V; "
     "the diminished harmony in m. 6 is read as vii° of the dominant (a passing dominant-preparation). "
     "Foreground variants may label cadential 64 in the V area; the middleground here rolls it into the V prolongation.",
-    styles["Normal"]))
+    notes_style))
 
 # Build PDF
-doc.build(story)
+try:
+    doc.build(story)
+finally:
+    if scaled_score:
+        os.unlink(scaled_score)  # only an intermediate, whether or not the build succeeded
+with open(PDF_PATH, "wb") as f:
+    f.write(buf.getvalue())
 print(f"Built three-page PDF: {PDF_PATH}")